@@ -1,17 +1,39 @@
+import hashlib
 import streamlit as st
 import pandas as pd
 from engine.generator import SQLGenerator
+from engine.sql_validator import SQLValidator
 from engine.entity_extractor import EntityExtractor
 from engine.value_matcher import ValueMatcher
 from engine.refiner import SQLRefiner
-from engine.executor import SQLExecutor
+from engine.executor import SQLExecutor, SpeculativeExecution
 from engine.analyzer import SQLAnalyzer
 from engine.visualizer import SQLVisualizer
+from engine.renderer import VisualizationRenderer
 from engine.schema_engine import SchemaEngine
+from engine.result_cache import ResultCache
+from llm_config.scheduler import scheduler
 
 st.set_page_config(page_title="NL Analytics Tool", layout="wide")
 st.title("Natural Language Analytics Tool")
 
+@st.cache_resource
+def load_pipeline():
+    """Engine objects hold no per-request state, so one set serves every session for the life of the process."""
+    return {
+        "generator": SQLGenerator(),
+        "validator": SQLValidator(),
+        "extractor": EntityExtractor(),
+        "matcher": ValueMatcher(),
+        "refiner": SQLRefiner(),
+        "executor": SQLExecutor(),
+        "analyzer": SQLAnalyzer(),
+        "visualizer": SQLVisualizer(),
+        "renderer": VisualizationRenderer()
+    }
+
+pipeline = load_pipeline()
+
 # Sidebar for API key and DB upload only
 with st.sidebar:
     st.header("Setup")
@@ -20,18 +42,33 @@ with st.sidebar:
         "Upload your data file",
         type=["db", "sqlite", "sqlite3", "csv", "xlsx", "xls"]
     )
+    with st.expander("LLM queue"):
+        llm_stats = scheduler.get_stats()
+        st.write(f"Queue depth: {llm_stats['queue_depth']}")
+        st.write(f"Running requests: {llm_stats['running']}")
+        st.write(f"Merged duplicate requests: {llm_stats['deduplicated_total']}")
+        st.write(f"Average wait: {llm_stats['avg_wait_seconds']:.2f}s (max {llm_stats['max_wait_seconds']:.2f}s)")
 
 engine = None
 schema_info = None
 if db_file is not None:
-    try:
-        with st.spinner("Processing uploaded file..."):
-            engine, schema_info = SchemaEngine.from_upload(db_file)
+    # Ingest each upload once per session rather than on every rerun. file_id is new
+    # for every upload, so an edited file with the same name and size is reloaded.
+    upload_key = getattr(db_file, 'file_id', None) or hashlib.sha256(db_file.getvalue()).hexdigest()
+    if st.session_state.get('upload_key') != upload_key:
+        try:
+            with st.spinner("Processing uploaded file..."):
+                st.session_state['upload'] = SchemaEngine.from_upload(db_file)
+            st.session_state['upload_key'] = upload_key
+            # Cached results only make sense for the file they were computed from
+            st.session_state['result_cache'] = ResultCache()
+        except Exception as e:
+            st.error(f"Error processing file: {str(e)}")
+            st.session_state.pop('upload', None)
+            st.session_state.pop('upload_key', None)
+    if st.session_state.get('upload_key') == upload_key:
+        engine, schema_info = st.session_state['upload']
         st.success(f"Successfully loaded {db_file.name}")
-    except Exception as e:
-        st.error(f"Error processing file: {str(e)}")
-        engine = None
-        schema_info = None
 
 # Main area for query and results
 st.header("Ask your question")
@@ -54,9 +91,14 @@ if st.session_state['run_workflow'] and user_query.strip():
         st.error("Could not extract schema from the uploaded file.")
         st.stop()
 
+    # Attach this session's recent results so follow-up questions can query them directly
+    result_cache = st.session_state['result_cache']
+    engine = result_cache.engine_for(engine)
+    schema_info = schema_info + result_cache.describe()
+
     # --- Workflow steps ---
     with st.spinner("Generating SQL query..."):
-        generator = SQLGenerator()
+        generator = pipeline['generator']
         try:
             sql_result = generator.main_generator(user_query, api_key, schema_info)
             generated_sql = sql_result['generated_sql']
@@ -64,47 +106,83 @@ if st.session_state['run_workflow'] and user_query.strip():
             st.error(f"SQL Generation Error: {e}")
             st.stop()
 
-    with st.spinner("Extracting entities..."):
-        extractor = EntityExtractor()
+    with st.spinner("Validating SQL query..."):
+        validator = pipeline['validator']
         try:
-            entities = extractor.main_entity_extractor(generated_sql, api_key)
+            validation = validator.main_validator(generated_sql, engine)
+            problems = validation['errors'] + validation['warnings']
+            if problems:
+                # One targeted repair attempt instead of running the pipeline on SQL that will fail
+                repaired_sql = generator.repair_sql(user_query, generated_sql, problems, api_key, schema_info)['generated_sql']
+                repaired_validation = validator.main_validator(repaired_sql, engine)
+                # Warnings alone never block a query, so keep it if the repair made things worse
+                if repaired_validation['valid'] or not validation['valid']:
+                    generated_sql, validation = repaired_sql, repaired_validation
+            if not validation['valid']:
+                st.error("SQL Validation Error: " + "; ".join(validation['errors']))
+                st.stop()
         except Exception as e:
-            st.error(f"Entity Extraction Error: {e}")
+            st.error(f"SQL Validation Error: {e}")
             st.stop()
 
-    with st.spinner("Matching values..."):
-        matcher = ValueMatcher()
-        value_mappings = []
-        try:
-            for entity in entities:
-                matches = matcher.main_value_matcher(entity, engine=engine)
-                value_mappings.extend(matches)
-        except Exception as e:
-            st.error(f"Value Matching Error: {e}")
-            st.stop()
+    # Start executing the generated SQL now; refinement usually leaves it unchanged
+    executor = pipeline['executor']
+    speculation = SpeculativeExecution(generated_sql, engine, executor)
 
-    with st.spinner("Refining SQL query..."):
-        refiner = SQLRefiner()
-        try:
-            # If no entities were found, use the original SQL
-            if not entities:
-                refined_sql = generated_sql
-            else:
-                refined_sql = refiner.main_refiner(generated_sql, value_mappings)['refined_sql']
-        except Exception as e:
-            st.error(f"SQL Refinement Error: {e}")
-            st.stop()
+    # Streamlit stops and reruns raise BaseException subclasses, so catch those too
+    try:
+        with st.spinner("Extracting entities..."):
+            extractor = pipeline['extractor']
+            try:
+                entities = extractor.main_entity_extractor(generated_sql, api_key)
+            except Exception as e:
+                st.error(f"Entity Extraction Error: {e}")
+                st.stop()
+
+        with st.spinner("Matching values..."):
+            matcher = pipeline['matcher']
+            value_mappings = []
+            try:
+                for entity in entities:
+                    matches = matcher.main_value_matcher(entity, engine=engine)
+                    value_mappings.extend(matches)
+            except Exception as e:
+                st.error(f"Value Matching Error: {e}")
+                st.stop()
+
+        with st.spinner("Refining SQL query..."):
+            refiner = pipeline['refiner']
+            try:
+                # If no entities were found, use the original SQL
+                if not entities:
+                    refined_sql = generated_sql
+                else:
+                    refined_sql = refiner.main_refiner(generated_sql, value_mappings)['refined_sql']
+            except Exception as e:
+                st.error(f"SQL Refinement Error: {e}")
+                st.stop()
+    except BaseException:
+        speculation.cancel()
+        raise
 
     st.header("Results")
     with st.spinner("Executing SQL query..."):
-        executor = SQLExecutor()
         try:
-            success, results, formatted_results, error = executor.main_executor(refined_sql, engine)
+            if speculation.matches(refined_sql):
+                success, results, formatted_results, error = speculation.result()
+            else:
+                speculation.cancel()
+                success, results, formatted_results, error = executor.main_executor(refined_sql, engine)
             if not success:
                 st.error(f"SQL Execution Error: {error}")
                 st.stop()
             if results:
                 st.dataframe(pd.DataFrame(results))
+                try:
+                    result_cache.register(user_query, results)
+                except Exception as cache_e:
+                    # Follow-up support is optional; never let it stop the pipeline
+                    st.warning(f"Could not cache results for follow-up questions: {cache_e}")
             else:
                 st.info("No results returned from SQL execution.")
         except Exception as e:
@@ -113,7 +191,7 @@ if st.session_state['run_workflow'] and user_query.strip():
 
     st.header("Analysis")
     with st.spinner("Analyzing results..."):
-        analyzer = SQLAnalyzer()
+        analyzer = pipeline['analyzer']
         try:
             analysis = analyzer.main_analyzer(user_query, results, api_key)['analysis']
             st.markdown(analysis, unsafe_allow_html=True)
@@ -122,81 +200,33 @@ if st.session_state['run_workflow'] and user_query.strip():
 
     st.header("Visualizations")
     with st.spinner("Generating visualization..."):
-        visualizer = SQLVisualizer()
+        visualizer = pipeline['visualizer']
         try:
             viz_code = visualizer.main_visualizer(user_query, results, api_key)['generated_code']
 
-            import matplotlib.pyplot as plt
-            import seaborn as sns
-            import io
-            import contextlib
-            
-            # Configure matplotlib for better quality in Streamlit
-            plt.rcParams['figure.dpi'] = 300
-            plt.rcParams['savefig.dpi'] = 300
-            plt.rcParams['figure.figsize'] = (10, 6)
-            plt.rcParams['font.size'] = 12
-            plt.rcParams['axes.titlesize'] = 14
-            plt.rcParams['axes.labelsize'] = 12
-            plt.rcParams['xtick.labelsize'] = 10
-            plt.rcParams['ytick.labelsize'] = 10
-            
-            # Patch plt.show to a no-op so figures remain open for Streamlit
-            plt.show = lambda *args, **kwargs: None
-            local_vars = {
-                'execution_results': results, 
-                'pd': pd, 
-                'plt': plt, 
-                'sns': sns,
-                'matplotlib': __import__('matplotlib'),
-                'seaborn': __import__('seaborn')
-            }
-            with contextlib.redirect_stdout(io.StringIO()):
-                try:
-                    # Clear any existing figures
-                    plt.close('all')
-                    
-                    # Execute the visualization code
-                    exec(viz_code, {}, local_vars)
-                    
-                    # Get all figures after execution
-                    all_figures = plt.get_fignums()
-                    
-                    if all_figures:
-                        for fig_num in all_figures:
-                            fig = plt.figure(fig_num)
-                            if fig.get_axes():  # Only display if figure has axes
-                                # Set high DPI for better quality
-                                fig.set_dpi(300)
-                                st.pyplot(fig, use_container_width=True)
-                            plt.close(fig)
+            renderer = pipeline['renderer']
+            render_result = renderer.main_renderer(viz_code, results)
+            if not render_result['success']:
+                st.warning(f"Could not render visualization: {render_result['error']}")
+            elif render_result['images']:
+                for image in render_result['images']:
+                    st.image(image)
+            else:
+                st.warning("No plots were generated by the visualization code.")
+                if results and isinstance(results, list) and len(results) > 0:
+                    df = pd.DataFrame(results)
+                    numeric_cols = df.select_dtypes(include='number').columns
+                    categorical_cols = df.select_dtypes(include='object').columns
+                    if len(numeric_cols) > 1:
+                        st.bar_chart(df[numeric_cols])
+                    elif len(numeric_cols) == 1:
+                        st.bar_chart(df[numeric_cols[0]])
+                    elif len(categorical_cols) > 0:
+                        st.bar_chart(df[categorical_cols[0]].value_counts())
                     else:
-                        st.warning("No plots were generated by the visualization code.")
-                        if results and isinstance(results, list) and len(results) > 0:
-                            df = pd.DataFrame(results)
-                            numeric_cols = df.select_dtypes(include='number').columns
-                            categorical_cols = df.select_dtypes(include='object').columns
-                            if len(numeric_cols) > 1:
-                                st.bar_chart(df[numeric_cols])
-                            elif len(numeric_cols) == 1:
-                                st.bar_chart(df[numeric_cols[0]])
-                            elif len(categorical_cols) > 0:
-                                import matplotlib.pyplot as plt
-                                import seaborn as sns
-                                plt.figure(figsize=(12, 8), dpi=300)
-                                df[categorical_cols[0]].value_counts().plot(kind='bar')
-                                plt.title(f'Count of {categorical_cols[0]}')
-                                plt.xticks(rotation=45, ha='right')
-                                plt.tight_layout()
-                                st.pyplot(plt.gcf(), use_container_width=True)
-                                plt.close()
-                            else:
-                                st.dataframe(df.head())
-                        else:
-                            st.info("No data available to visualize.")
-                except Exception as viz_e:
-                    st.warning(f"Could not render visualization: {viz_e}")
-                    st.error(f"Visualization execution error: {str(viz_e)}")
+                        st.dataframe(df.head())
+                else:
+                    st.info("No data available to visualize.")
         except Exception as e:
             st.error(f"Visualization Error: {e}")
 else:
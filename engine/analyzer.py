@@ -1,12 +1,6 @@
-import os
-import sys
-
-# Add the project root directory to Python path
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(project_root)
-
 from typing import Dict, List, Tuple, Union
 from llm_config.llm_call import generate_text
+from llm_config.scheduler import PRIORITY_BACKGROUND
 
 class SQLAnalyzer:
     def main_analyzer(self, query_info: str, query_results: List[Dict] = None, api_key: str = None) -> Dict[str, Union[bool, str, int, dict]]:
@@ -55,7 +49,7 @@ class SQLAnalyzer:
                 """
             
             # Get analysis from LLM
-            analysis = generate_text(prompt, api_key)
+            analysis = generate_text(prompt, api_key, priority=PRIORITY_BACKGROUND)
             
             return {
                 "success": True,
@@ -0,0 +1,190 @@
+import re
+import warnings
+from typing import Dict, List, Optional
+import pandas as pd
+
+# Above these cardinalities a category axis stops being readable
+MAX_BAR_CATEGORIES = 30
+MAX_HEATMAP_CATEGORIES = 25
+MAX_TIME_SERIES_MEASURES = 4
+# Integer columns whose name ends in one of these words are periods (year, month number, ...),
+# not measures; days_overdue, monthly_revenue and holiday_sales stay measures
+TIME_COLUMN_PATTERN = re.compile(
+    r"(?:^|[\W_])(?:year|yr|month|quarter|qtr|week|day|hour|period)(?:[\W_]+(?:num|number|no|id))?$",
+    re.IGNORECASE
+)
+MIN_YEAR, MAX_YEAR = 1800, 2200
+
+class ChartRecommender:
+    def _is_datetime_column(self, series: pd.Series) -> bool:
+        """
+        Check whether a column holds dates, either as a datetime dtype or as
+        text values that all parse as dates (SQLite returns dates as strings).
+        """
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return True
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            return False
+        sample = series.dropna().head(50)
+        if sample.empty or not all(isinstance(value, str) for value in sample):
+            return False
+        # Plain numbers stored as text would otherwise parse as years
+        if sample.str.fullmatch(r"\d+(\.\d+)?").any():
+            return False
+        with warnings.catch_warnings():
+            # Mixed formats fall back to per-element parsing, which is fine for a sample
+            warnings.simplefilter("ignore", UserWarning)
+            parsed = pd.to_datetime(sample, errors="coerce")
+        return bool(parsed.notna().all())
+
+    def _is_integer_time_column(self, series: pd.Series, position: int) -> bool:
+        """
+        Check whether an integer column is a time axis such as a year or month
+        number: unique, increasing, and either a period-like name or, for the
+        first column only, year-like values. Results sorted by a measure (ORDER
+        BY ... DESC) are therefore never mistaken for a time series.
+        """
+        if not pd.api.types.is_integer_dtype(series) or len(series) < 2:
+            return False
+        if not series.is_unique or not series.is_monotonic_increasing:
+            return False
+        if position == 0 and series.between(MIN_YEAR, MAX_YEAR).all():
+            return True
+        return bool(TIME_COLUMN_PATTERN.search(str(series.name)))
+
+    def _classify_columns(self, df: pd.DataFrame) -> Dict[str, List[str]]:
+        """
+        Split result columns into numeric, datetime and categorical groups.
+        """
+        column_groups = {"numeric": [], "datetime": [], "categorical": []}
+        for position, column in enumerate(df.columns):
+            series = df[column]
+            if pd.api.types.is_bool_dtype(series):
+                column_groups["categorical"].append(column)
+            elif self._is_integer_time_column(series, position) and not column_groups["datetime"]:
+                column_groups["datetime"].append(column)
+            elif pd.api.types.is_numeric_dtype(series):
+                column_groups["numeric"].append(column)
+            elif self._is_datetime_column(series):
+                column_groups["datetime"].append(column)
+            else:
+                column_groups["categorical"].append(column)
+        return column_groups
+
+    def _line_code(self, date_col: str, measures: List[str], parse_dates: bool = True) -> str:
+        plot_lines = "\n".join(
+            f"plt.plot(df[{date_col!r}], df[{measure!r}], marker='o', markersize=3, label={str(measure)!r})"
+            for measure in measures
+        )
+        ylabel = measures[0] if len(measures) == 1 else "Value"
+        # Integer periods (years, month numbers) are plotted as they are
+        convert_dates = f"df[{date_col!r}] = pd.to_datetime(df[{date_col!r}], errors='coerce')\n" if parse_dates else ""
+        return f"""df = pd.DataFrame(execution_results)
+{convert_dates}df = df.dropna(subset=[{date_col!r}]).sort_values({date_col!r})
+plt.figure(figsize=(12, 8))
+{plot_lines}
+plt.title({f"{', '.join(map(str, measures))} over {date_col}"!r})
+plt.xlabel({str(date_col)!r})
+plt.ylabel({str(ylabel)!r})
+{"plt.legend()" if len(measures) > 1 else ""}
+plt.xticks(rotation=45, ha='right')
+plt.grid(True, alpha=0.3)
+plt.tight_layout()"""
+
+    def _bar_code(self, category_col: str, measure: str, cardinality: int) -> str:
+        title = f"{measure} by {category_col}"
+        if cardinality > MAX_BAR_CATEGORIES:
+            title = f"Top {MAX_BAR_CATEGORIES} {category_col} by {measure}"
+        return f"""df = pd.DataFrame(execution_results)
+plot_df = df.groupby({category_col!r}, dropna=False)[{measure!r}].sum().sort_values(ascending=False).head({MAX_BAR_CATEGORIES})
+plt.figure(figsize=(12, 8))
+sns.barplot(x=plot_df.index.astype(str), y=plot_df.values, color='steelblue')
+plt.title({title!r})
+plt.xlabel({str(category_col)!r})
+plt.ylabel({str(measure)!r})
+plt.xticks(rotation=45, ha='right')
+plt.tight_layout()"""
+
+    def _count_bar_code(self, category_col: str) -> str:
+        return f"""df = pd.DataFrame(execution_results)
+counts = df[{category_col!r}].astype(str).value_counts().head({MAX_BAR_CATEGORIES})
+plt.figure(figsize=(12, 8))
+sns.barplot(x=counts.index, y=counts.values, color='steelblue')
+plt.title({f"Count of {category_col}"!r})
+plt.xlabel({str(category_col)!r})
+plt.ylabel('Count')
+plt.xticks(rotation=45, ha='right')
+plt.tight_layout()"""
+
+    def _histogram_code(self, measure: str) -> str:
+        return f"""df = pd.DataFrame(execution_results)
+plt.figure(figsize=(12, 8))
+sns.histplot(df[{measure!r}].dropna(), bins=30, kde=True, color='steelblue')
+plt.title({f"Distribution of {measure}"!r})
+plt.xlabel({str(measure)!r})
+plt.ylabel('Frequency')
+plt.tight_layout()"""
+
+    def _scatter_code(self, x_col: str, y_col: str) -> str:
+        return f"""df = pd.DataFrame(execution_results)
+plt.figure(figsize=(12, 8))
+sns.scatterplot(data=df, x={x_col!r}, y={y_col!r}, alpha=0.6, s=20)
+plt.title({f"{y_col} vs {x_col}"!r})
+plt.xlabel({str(x_col)!r})
+plt.ylabel({str(y_col)!r})
+plt.grid(True, alpha=0.3)
+plt.tight_layout()"""
+
+    def _heatmap_code(self, row_col: str, col_col: str, measure: str) -> str:
+        return f"""df = pd.DataFrame(execution_results)
+pivot = df.pivot_table(index={row_col!r}, columns={col_col!r}, values={measure!r}, aggfunc='sum')
+plt.figure(figsize=(12, 8))
+sns.heatmap(pivot, annot=pivot.size <= 100, fmt='.3g', cmap='viridis')
+plt.title({f"{measure} by {row_col} and {col_col}"!r})
+plt.xlabel({str(col_col)!r})
+plt.ylabel({str(row_col)!r})
+plt.tight_layout()"""
+
+    def main_recommender(self, query_results: List[Dict]) -> Dict[str, Optional[str]]:
+        """
+        Pick a chart for common result shapes from column types and cardinalities.
+        Args:
+            query_results: List of dictionaries with SQL results
+        Returns:
+            Dict with keys: chart_type, generated_code (both None when the shape
+            is unusual and the LLM should decide)
+        """
+        no_match = {"chart_type": None, "generated_code": None}
+        if not query_results:
+            return no_match
+
+        df = pd.DataFrame(query_results)
+        groups = self._classify_columns(df)
+        numeric, dates, categories = groups["numeric"], groups["datetime"], groups["categorical"]
+
+        if len(dates) == 1 and not categories and 1 <= len(numeric) <= MAX_TIME_SERIES_MEASURES:
+            parse_dates = not pd.api.types.is_integer_dtype(df[dates[0]])
+            return {"chart_type": "line", "generated_code": self._line_code(dates[0], numeric, parse_dates)}
+
+        if dates:
+            return no_match
+
+        if len(categories) == 1 and len(numeric) == 1:
+            cardinality = df[categories[0]].nunique(dropna=False)
+            return {"chart_type": "bar", "generated_code": self._bar_code(categories[0], numeric[0], cardinality)}
+
+        if len(categories) == 1 and not numeric:
+            return {"chart_type": "bar", "generated_code": self._count_bar_code(categories[0])}
+
+        if len(categories) == 2 and len(numeric) == 1:
+            if all(df[column].nunique() <= MAX_HEATMAP_CATEGORIES for column in categories):
+                return {"chart_type": "heatmap", "generated_code": self._heatmap_code(categories[0], categories[1], numeric[0])}
+            return no_match
+
+        if not categories and len(numeric) == 1 and len(df) > 1:
+            return {"chart_type": "histogram", "generated_code": self._histogram_code(numeric[0])}
+
+        if not categories and len(numeric) == 2:
+            return {"chart_type": "scatter", "generated_code": self._scatter_code(numeric[0], numeric[1])}
+
+        return no_match
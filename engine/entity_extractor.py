@@ -1,10 +1,3 @@
-import os
-import sys
-
-# Add the project root directory to Python path
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(project_root)
-
 from typing import Dict, List
 from llm_config.llm_call import generate_text
 
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import pandas as pd
+
+# calamine (Rust) parses xlsx/xls many times faster than openpyxl
+EXCEL_ENGINE = "calamine"
+EXCEL_CACHE_DIR = os.path.join(tempfile.gettempdir(), "nl2sql_excel_cache")
+MANIFEST_FILE = "manifest.json"
+MAX_SHEET_WORKERS = os.cpu_count() or 4
+# Entries are evicted least recently used first once either limit is exceeded
+MAX_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+MAX_CACHE_AGE_SECONDS = 7 * 24 * 60 * 60
+
+
+def _normalize_for_parquet(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Make a sheet storable as Parquet: string column names and no mixed-type
+    object columns (cells holding both numbers and text become text).
+    """
+    df.columns = [str(col) for col in df.columns]
+    for col in df.columns:
+        if pd.api.types.is_object_dtype(df[col]) and pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed"):
+            df[col] = df[col].map(lambda value: value if pd.isna(value) else str(value))
+    return df
+
+
+def _convert_sheet(workbook_path: str, sheet_name: str, parquet_path: str) -> bool:
+    """
+    Parse one sheet and write it to Parquet. Runs in a worker process.
+    Returns False for sheets without any columns.
+    """
+    df = pd.read_excel(workbook_path, sheet_name=sheet_name, engine=EXCEL_ENGINE)
+    if df.columns.empty:
+        return False
+    _normalize_for_parquet(df).to_parquet(parquet_path, index=False)
+    return True
+
+
+class ExcelIngestor:
+    def __init__(self, cache_dir: str = EXCEL_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _table_names(self, sheet_names: List[str]) -> List[str]:
+        """
+        Turn sheet names into unique SQL-friendly table names.
+        """
+        table_names = []
+        for index, sheet_name in enumerate(sheet_names):
+            name = re.sub(r"\W+", "_", str(sheet_name)).strip("_") or f"sheet_{index + 1}"
+            if name[0].isdigit():
+                name = f"sheet_{name}"
+            candidate, suffix = name, 2
+            while candidate.lower() in (existing.lower() for existing in table_names):
+                candidate = f"{name}_{suffix}"
+                suffix += 1
+            table_names.append(candidate)
+        return table_names
+
+    def _load_manifest(self, cache_path: str) -> Optional[Dict[str, str]]:
+        manifest_path = os.path.join(cache_path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as manifest_file:
+            tables = json.load(manifest_file)
+        if not all(os.path.exists(path) for path in tables.values()):
+            return None
+        return tables
+
+    def _directory_size(self, path: str) -> int:
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def _evict(self, keep_path: str):
+        """
+        Drop cache entries older than MAX_CACHE_AGE_SECONDS, then the least
+        recently used ones until the cache fits in MAX_CACHE_BYTES.
+        Entry directories are touched on every hit, so mtime tracks last use.
+        Directories without a valid manifest may be conversions still in
+        progress, so they are only removed once they exceed the age limit.
+        """
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if path == keep_path or not os.path.isdir(path):
+                continue
+            try:
+                last_used = os.path.getmtime(path)
+            except OSError:
+                continue
+            if now - last_used > MAX_CACHE_AGE_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+            elif self._load_manifest(path) is not None:
+                entries.append((last_used, path, self._directory_size(path)))
+
+        total = self._directory_size(keep_path) + sum(size for _, _, size in entries)
+        for _, path, size in sorted(entries):
+            if total <= MAX_CACHE_BYTES:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def _convert_workbook(self, workbook_path: str, cache_path: str) -> Dict[str, str]:
+        """
+        Convert every sheet to Parquet, in parallel worker processes when there
+        is more than one sheet, and publish the cache entry atomically.
+        """
+        with pd.ExcelFile(workbook_path, engine=EXCEL_ENGINE) as workbook:
+            sheet_names = workbook.sheet_names
+        table_names = self._table_names(sheet_names)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging_path = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            parquet_paths = [os.path.join(staging_path, f"{table}.parquet") for table in table_names]
+            if len(sheet_names) == 1:
+                converted = [_convert_sheet(workbook_path, sheet_names[0], parquet_paths[0])]
+            else:
+                workers = min(len(sheet_names), MAX_SHEET_WORKERS)
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    converted = list(pool.map(_convert_sheet, [workbook_path] * len(sheet_names), sheet_names, parquet_paths))
+
+            tables = {
+                table: os.path.join(cache_path, os.path.basename(path))
+                for table, path, ok in zip(table_names, parquet_paths, converted) if ok
+            }
+            with open(os.path.join(staging_path, MANIFEST_FILE), "w") as manifest_file:
+                json.dump(tables, manifest_file)
+            if os.path.isdir(cache_path) and self._load_manifest(cache_path) is None:
+                # Leftover from an interrupted or partially deleted conversion
+                shutil.rmtree(cache_path, ignore_errors=True)
+            try:
+                os.replace(staging_path, cache_path)
+            except OSError:
+                # Another upload of the same workbook published the entry first
+                shutil.rmtree(staging_path, ignore_errors=True)
+            self._evict(cache_path)
+            return self._load_manifest(cache_path) or {}
+        except Exception:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+
+    def main_ingestor(self, db_file) -> Dict[str, str]:
+        """
+        Convert an uploaded workbook into one Parquet file per sheet.
+        Conversions are cached by workbook hash, so re-uploading a known
+        workbook skips Excel parsing entirely.
+        Args:
+            db_file: Uploaded Excel file object
+        Returns:
+            Dictionary mapping table names to Parquet file paths, in sheet order
+        """
+        content = db_file.read()
+        workbook_hash = hashlib.sha256(content).hexdigest()
+        cache_path = os.path.join(self.cache_dir, workbook_hash)
+        tables = self._load_manifest(cache_path)
+        if tables is not None:
+            # Mark the entry as recently used so eviction keeps it
+            os.utime(cache_path)
+            return tables
+
+        suffix = db_file.name.split('.')[-1].lower()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{suffix}') as tmp_file:
+            tmp_file.write(content)
+            workbook_path = tmp_file.name
+        try:
+            return self._convert_workbook(workbook_path, cache_path)
+        finally:
+            os.remove(workbook_path)
@@ -1,7 +1,12 @@
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 import re
+import threading
 from sqlalchemy import text
 
+# Shared by all sessions; speculative queries are read-only and short-lived
+_speculation_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sql-speculation")
+
 class SQLExecutor:
     def format_results_for_analysis(self, results: List[Dict]) -> str:
         """
@@ -59,9 +64,15 @@ class SQLExecutor:
                 
         return True
 
-    def main_executor(self, sql_query: str, engine) -> Tuple[bool, List[Dict], str, str]:
+    def main_executor(self, sql_query: str, engine, on_connect: Optional[Callable] = None) -> Tuple[bool, List[Dict], str, str]:
         """
         Validate and execute SQL query safely using the provided engine
+        Args:
+            sql_query: SQL query to execute
+            engine: SQLAlchemy engine for the uploaded database
+            on_connect: Optional callback receiving the raw DBAPI connection before
+                the query runs, so another thread can interrupt it. It may return a
+                cleanup callable, which is called before the connection is released
         Returns:
             Tuple containing:
             - success: bool
@@ -76,13 +87,77 @@ class SQLExecutor:
             
             # Execute the query directly using the provided engine
             with engine.connect() as connection:
-                result = connection.execute(text(sql_query))
-                columns = result.keys()
-                rows = result.fetchall()
+                release = on_connect(connection.connection.dbapi_connection) if on_connect is not None else None
+                try:
+                    result = connection.execute(text(sql_query))
+                    columns = result.keys()
+                    rows = result.fetchall()
+                finally:
+                    # Must run before the connection is checked back into the pool
+                    if release is not None:
+                        release()
                 
             # Convert to list of dictionaries
             results = [dict(zip(columns, row)) for row in rows]
             formatted_results = self.format_results_for_analysis(results)
             return True, results, formatted_results, ""
         except Exception as e:
-            return False, [], "", str(e) 
\ No newline at end of file
+            return False, [], "", str(e)
+
+
+class SpeculativeExecution:
+    """
+    Run the generated SQL in the background while entities are extracted,
+    matched and refined. If refinement leaves the SQL unchanged the result is
+    reused; otherwise the running query is interrupted and discarded.
+    """
+    def __init__(self, sql_query: str, engine, executor: SQLExecutor = None):
+        self.sql_query = sql_query
+        self._engine = engine
+        self._executor = executor or SQLExecutor()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._dbapi_connection = None
+        self._future = _speculation_pool.submit(self._run, engine)
+
+    def _register_connection(self, dbapi_connection) -> Callable:
+        with self._lock:
+            if self._cancelled.is_set():
+                raise RuntimeError("Speculative execution cancelled")
+            self._dbapi_connection = dbapi_connection
+        return self._release_connection
+
+    def _release_connection(self):
+        # Once released the connection may serve another caller, so cancel() must not touch it
+        with self._lock:
+            self._dbapi_connection = None
+
+    def _run(self, engine) -> Tuple[bool, List[Dict], str, str]:
+        return self._executor.main_executor(self.sql_query, engine, on_connect=self._register_connection)
+
+    def matches(self, sql_query: str) -> bool:
+        """
+        Check whether the final SQL is the query that is already running.
+        """
+        return " ".join(sql_query.split()) == " ".join(self.sql_query.split())
+
+    def result(self) -> Tuple[bool, List[Dict], str, str]:
+        """
+        Wait for the speculative run and return the main_executor tuple.
+        If the run is still queued behind other sessions' queries it is taken
+        off the shared pool and executed here instead.
+        """
+        if self._future.cancel():
+            return self._executor.main_executor(self.sql_query, self._engine)
+        return self._future.result()
+
+    def cancel(self):
+        """
+        Stop the speculative run, interrupting the query if it has started.
+        """
+        with self._lock:
+            self._cancelled.set()
+            self._future.cancel()
+            if self._dbapi_connection is not None:
+                # sqlite3 allows interrupt() from another thread
+                self._dbapi_connection.interrupt()
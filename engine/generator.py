@@ -1,11 +1,4 @@
-import os
-import sys
-from typing import Dict
-
-# Add the project root directory to Python path
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(project_root)
-
+from typing import Dict, List
 from llm_config.llm_call import generate_text
 
 class SQLGenerator:
@@ -47,4 +40,27 @@ class SQLGenerator:
         return {
             "user_query": user_query,
             "generated_sql": generated_sql
+        }
+
+    def repair_sql(self, user_query: str, generated_sql: str, errors: List[str], api_key: str = None, schema_info: str = None) -> Dict:
+        """
+        Fix a generated SQL query using the errors reported by local validation.
+        
+        Args:
+            user_query: Natural language query from user
+            generated_sql: SQL query that failed validation
+            errors: Precise validation errors for the query
+            api_key: API key for LLM (optional, will use .env if not provided)
+            schema_info: Formatted schema string from user-uploaded file
+        Returns:
+            Dictionary containing:
+                - user_query: Original user query
+                - generated_sql: Repaired SQL query
+        """
+        repair_prompt = f"""Given these tables and columns (Schema):\n{schema_info}\n\nThis SQL query was written for the request "{user_query}" but fails against the schema:\n{generated_sql}\n\nErrors:\n{chr(10).join(f"- {error}" for error in errors)}\n\nRequirements:\n- Fix only what the errors describe and keep the rest of the query unchanged\n- Use table and column names exactly as defined in the schema\n- Return ONLY the raw SQL query text, no markdown formatting or explanations"""
+        repaired_sql = generate_text(repair_prompt, api_key)
+        repaired_sql = self._clean_sql_output(repaired_sql)
+        return {
+            "user_query": user_query,
+            "generated_sql": repaired_sql
         }
\ No newline at end of file
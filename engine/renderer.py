@@ -0,0 +1,263 @@
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Limits applied to every render so a bad script cannot block the server
+RENDER_TIMEOUT_SECONDS = 30
+# How long a render may wait for a free worker before it is abandoned
+RENDER_QUEUE_TIMEOUT_SECONDS = 60
+RENDER_MEMORY_LIMIT_BYTES = 2 * 1024 * 1024 * 1024
+RENDER_PROCESSES = 2
+MAX_PLOT_ROWS = 5000
+MAX_CACHED_RENDERS = 64
+# Slots in the shared ring of cancelled task ids, indexed by task_id modulo its size
+CANCELLED_TASK_SLOTS = 1024
+POLL_INTERVAL_SECONDS = 0.1
+
+_pool = None
+_pool_lock = threading.Lock()
+# Workers report when a task starts and ends so a stuck task's worker can be killed alone
+_started_queue = None
+_cancelled_tasks = None
+_task_lock = threading.Lock()
+_task_pids = {}
+_abandoned_tasks = set()
+_task_ids = itertools.count(1)
+_worker_started_queue = None
+_worker_cancelled_tasks = None
+_render_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _init_worker(memory_limit: int, started_queue, cancelled_tasks):
+    """Cap the address space of a render worker (POSIX only)."""
+    global _worker_started_queue, _worker_cancelled_tasks
+    _worker_started_queue = started_queue
+    _worker_cancelled_tasks = cancelled_tasks
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    except (ImportError, ValueError, OSError):
+        # resource is not available on Windows; render without a memory cap
+        pass
+
+
+def _render_in_worker(task_id: int, viz_code: str, execution_results: List[Dict], dpi: int) -> List[bytes]:
+    """
+    Execute visualization code inside a pool worker and return each figure as PNG bytes.
+    Tasks whose caller gave up while they were queued are skipped.
+    """
+    if _worker_cancelled_tasks[task_id % CANCELLED_TASK_SLOTS] == task_id:
+        _worker_started_queue.put(("skipped", task_id, None))
+        return None
+    _worker_started_queue.put(("started", task_id, os.getpid()))
+    try:
+        return _draw(viz_code, execution_results, dpi)
+    finally:
+        _worker_started_queue.put(("finished", task_id, None))
+
+
+def _draw(viz_code: str, execution_results: List[Dict], dpi: int) -> List[bytes]:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
+    plt.rcParams['figure.figsize'] = (10, 6)
+    plt.rcParams['font.size'] = 12
+    plt.rcParams['axes.titlesize'] = 14
+    plt.rcParams['axes.labelsize'] = 12
+    plt.rcParams['xtick.labelsize'] = 10
+    plt.rcParams['ytick.labelsize'] = 10
+
+    # Patch plt.show to a no-op so figures remain open until they are saved
+    plt.show = lambda *args, **kwargs: None
+    plt.close('all')
+    local_vars = {
+        'execution_results': execution_results,
+        'pd': pd,
+        'plt': plt,
+        'sns': sns,
+        'matplotlib': matplotlib,
+        'seaborn': sns
+    }
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            exec(viz_code, {}, local_vars)
+
+        images = []
+        for fig_num in plt.get_fignums():
+            fig = plt.figure(fig_num)
+            if fig.get_axes():  # Only keep figures that actually contain a plot
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+                images.append(buffer.getvalue())
+        return images
+    finally:
+        plt.close('all')
+
+
+def _get_pool():
+    global _pool, _started_queue, _cancelled_tasks
+    with _pool_lock:
+        if _pool is None:
+            # spawn keeps workers independent of the server's threads and imported state
+            context = multiprocessing.get_context("spawn")
+            _started_queue = context.SimpleQueue()
+            _cancelled_tasks = context.Array("q", CANCELLED_TASK_SLOTS, lock=False)
+            _pool = context.Pool(
+                processes=RENDER_PROCESSES,
+                initializer=_init_worker,
+                initargs=(RENDER_MEMORY_LIMIT_BYTES, _started_queue, _cancelled_tasks),
+                maxtasksperchild=50
+            )
+            threading.Thread(target=_collect_task_reports, args=(_started_queue,), daemon=True).start()
+        return _pool
+
+
+def _kill_pid(pid: int):
+    try:
+        os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+    except OSError:
+        # The worker finished or was already replaced
+        pass
+
+
+def _collect_task_reports(started_queue):
+    """
+    Track which worker runs which task. A task that starts after its caller
+    gave up is killed straight away, since nobody will wait for it.
+    """
+    while True:
+        event, task_id, pid = started_queue.get()
+        with _task_lock:
+            if event == "started" and task_id in _abandoned_tasks:
+                _abandoned_tasks.discard(task_id)
+                _kill_pid(pid)
+            elif event == "started":
+                _task_pids[task_id] = (pid, time.monotonic())
+            else:
+                _task_pids.pop(task_id, None)
+                _abandoned_tasks.discard(task_id)
+
+
+def _task_started_at(task_id: int) -> Optional[float]:
+    with _task_lock:
+        started = _task_pids.get(task_id)
+    return started[1] if started else None
+
+
+def _abandon_task(task_id: int):
+    """
+    Give up on a task: kill its worker if it is running, otherwise make sure
+    it is skipped (or killed on start) once a worker picks it up. The pool
+    replaces a killed worker, and renders on other workers are unaffected.
+    """
+    with _task_lock:
+        _cancelled_tasks[task_id % CANCELLED_TASK_SLOTS] = task_id
+        started = _task_pids.pop(task_id, None)
+        if started is None:
+            _abandoned_tasks.add(task_id)
+    if started is not None:
+        _kill_pid(started[0])
+
+
+class VisualizationRenderer:
+    def __init__(self, timeout: int = RENDER_TIMEOUT_SECONDS, max_rows: int = MAX_PLOT_ROWS):
+        self.timeout = timeout
+        self.max_rows = max_rows
+
+    def _cache_key(self, viz_code: str, query_results: List[Dict]) -> str:
+        payload = json.dumps(query_results, sort_keys=True, default=str)
+        return hashlib.sha256(f"{viz_code}\0{payload}".encode("utf-8")).hexdigest()
+
+    def _downsample(self, query_results: List[Dict]) -> List[Dict]:
+        """
+        Reduce large result sets to at most max_rows evenly spaced rows.
+        Row order is preserved so line and time-series plots keep their shape.
+        """
+        row_count = len(query_results)
+        if row_count <= self.max_rows:
+            return query_results
+        return [query_results[(i * row_count) // self.max_rows] for i in range(self.max_rows)]
+
+    def _adaptive_dpi(self, row_count: int) -> int:
+        """Lower the resolution as results grow, since dense plots gain little from it."""
+        if row_count <= 500:
+            return 200
+        if row_count <= self.max_rows:
+            return 150
+        return 100
+
+    def _wait_for_render(self, task_id: int, async_result) -> List[bytes]:
+        """
+        Wait for a render, timing it from when a worker starts it rather than
+        from submission, so renders queued behind others get their full timeout.
+        """
+        queued_at = time.monotonic()
+        while True:
+            started_at = _task_started_at(task_id)
+            if started_at is None:
+                remaining = queued_at + RENDER_QUEUE_TIMEOUT_SECONDS - time.monotonic()
+                error = f"Visualization waited more than {RENDER_QUEUE_TIMEOUT_SECONDS} seconds for a free worker"
+            else:
+                remaining = started_at + self.timeout - time.monotonic()
+                error = f"Visualization timed out after {self.timeout} seconds"
+            if remaining <= 0:
+                raise multiprocessing.TimeoutError(error)
+            try:
+                return async_result.get(timeout=min(remaining, POLL_INTERVAL_SECONDS))
+            except multiprocessing.TimeoutError:
+                continue
+
+    def main_renderer(self, viz_code: str, query_results: List[Dict]) -> Dict:
+        """
+        Render visualization code in a sandboxed worker process.
+        Args:
+            viz_code: Python plotting code that reads from 'execution_results'
+            query_results: List of dictionaries with SQL results
+        Returns:
+            Dict with keys: success, images (list of PNG bytes), cached, error
+        """
+        query_results = query_results or []
+        key = self._cache_key(viz_code, query_results)
+        with _cache_lock:
+            if key in _render_cache:
+                _render_cache.move_to_end(key)
+                return {"success": True, "images": _render_cache[key], "cached": True, "error": None}
+
+        dpi = self._adaptive_dpi(len(query_results))
+        plot_rows = self._downsample(query_results)
+        task_id = next(_task_ids)
+        try:
+            async_result = _get_pool().apply_async(_render_in_worker, (task_id, viz_code, plot_rows, dpi))
+            images = self._wait_for_render(task_id, async_result)
+        except multiprocessing.TimeoutError as e:
+            # The worker is stuck in user code or the queue is backed up; give up on this task only
+            _abandon_task(task_id)
+            return {"success": False, "images": [], "cached": False, "error": str(e)}
+        except MemoryError:
+            return {
+                "success": False,
+                "images": [],
+                "cached": False,
+                "error": "Visualization exceeded the memory limit"
+            }
+        except Exception as e:
+            return {"success": False, "images": [], "cached": False, "error": str(e)}
+
+        with _cache_lock:
+            _render_cache[key] = images
+            while len(_render_cache) > MAX_CACHED_RENDERS:
+                _render_cache.popitem(last=False)
+        return {"success": True, "images": images, "cached": False, "error": None}
@@ -0,0 +1,112 @@
+import tempfile
+import weakref
+from collections import deque
+from typing import Dict, List
+import pandas as pd
+from sqlalchemy import create_engine, event, text
+from engine.schema_engine import SchemaEngine, _remove_file
+
+MAX_CACHED_RESULTS = 3
+MAX_CACHED_RESULT_ROWS = 100000
+RESULT_TABLE_PREFIX = "previous_result"
+RESULTS_SCHEMA_NAME = "previous"
+
+class ResultCache:
+    """
+    Keeps the last few result sets of a session as SQLite tables so follow-up
+    questions can be answered from them instead of the full database.
+    The most recent result is always previous_result_1.
+    """
+    def __init__(self, max_results: int = MAX_CACHED_RESULTS):
+        self.max_results = max_results
+        self._results = deque(maxlen=max_results)
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.sqlite') as tmp_file:
+            self.results_path = tmp_file.name
+        # Sessions are replaced when a new file is uploaded; take the results file with them
+        weakref.finalize(self, _remove_file, self.results_path)
+        self._write_engine = create_engine(f"sqlite:///{self.results_path}")
+        # pysqlite commits DDL implicitly; let SQLAlchemy own BEGIN so DROP/CREATE can roll back
+        event.listen(self._write_engine, "connect", self._disable_implicit_transactions)
+        event.listen(self._write_engine, "begin", lambda connection: connection.exec_driver_sql("BEGIN"))
+        self._base_path = None
+        self._query_engine = None
+
+    @staticmethod
+    def _disable_implicit_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    def _table_name(self, position: int) -> str:
+        return f"{RESULT_TABLE_PREFIX}_{position}"
+
+    def _unique_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        SQLite column names are case-insensitive, so rename clashes such as
+        Name/name to name_2 before writing.
+        """
+        seen, columns = set(), []
+        for column in map(str, df.columns):
+            candidate, suffix = column, 2
+            while candidate.lower() in seen:
+                candidate = f"{column}_{suffix}"
+                suffix += 1
+            seen.add(candidate.lower())
+            columns.append(candidate)
+        df.columns = columns
+        return df
+
+    def register(self, user_query: str, query_results: List[Dict]) -> bool:
+        """
+        Store a result set as previous_result_1, shifting older ones back.
+        Results that are empty or too large to be worth caching are skipped.
+        All tables are rewritten in one transaction and the in-memory list only
+        changes once that succeeds, so a failed write leaves the cache intact.
+        """
+        if not query_results or len(query_results) > MAX_CACHED_RESULT_ROWS:
+            return False
+        new_df = self._unique_columns(pd.DataFrame(query_results))
+        results = [(user_query, new_df)] + list(self._results)[:self.max_results - 1]
+        with self._write_engine.begin() as connection:
+            for position in range(1, self.max_results + 1):
+                connection.execute(text(f'DROP TABLE IF EXISTS "{self._table_name(position)}"'))
+            for position, (_, df) in enumerate(results, start=1):
+                df.to_sql(self._table_name(position), connection, index=False)
+        self._results.appendleft((user_query, new_df))
+        return True
+
+    def describe(self) -> str:
+        """
+        Schema section for the cached results, to append to the generator context.
+        """
+        if not self._results:
+            return ""
+        sections = []
+        for position, (user_query, df) in enumerate(self._results, start=1):
+            columns = [f"{col} ({str(dtype)})" for col, dtype in df.dtypes.items()]
+            sections.append(
+                f"Table: {self._table_name(position)}\n"
+                f"Result of the earlier question: {user_query}\n"
+                f"Rows: {len(df)}\n"
+                f"Columns:\n" + "\n".join(f"  - {col}" for col in columns)
+            )
+        return (
+            "\n\nPrevious results (small tables holding earlier answers; query these "
+            "directly when the request refines or drills into an earlier result):\n\n"
+            + "\n\n".join(sections)
+        )
+
+    def engine_for(self, engine):
+        """
+        Return an engine over the uploaded database with the cached results attached.
+        Unqualified table names resolve to the upload first and then to the results.
+        """
+        with engine.connect() as connection:
+            database_list = connection.exec_driver_sql("PRAGMA database_list").fetchall()
+        base_path = next(row[2] for row in database_list if row[1] == "main")
+        if base_path != self._base_path:
+            if self._query_engine is not None:
+                self._query_engine.dispose()
+            self._query_engine = SchemaEngine._create_read_only_engine(
+                base_path, attachments={RESULTS_SCHEMA_NAME: self.results_path}
+            )
+            self._base_path = base_path
+        return self._query_engine
@@ -1,7 +1,25 @@
 import os
+import sqlite3
 import tempfile
+import weakref
+from pathlib import Path
 import pandas as pd
 from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import QueuePool
+from engine.excel_ingestor import ExcelIngestor
+
+# Read-side tuning for uploaded databases; uploads are never modified after ingestion
+READ_MMAP_SIZE_BYTES = 512 * 1024 * 1024
+READ_CACHE_SIZE_KIB = 64 * 1024
+READ_POOL_SIZE = os.cpu_count() or 4
+PARQUET_BATCH_ROWS = 50000
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        # Already gone, or still open on a platform that forbids deleting open files
+        pass
 
 class SchemaEngine:
     @staticmethod
@@ -11,24 +29,117 @@ class SchemaEngine:
             with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{suffix}') as tmp_file:
                 tmp_file.write(db_file.read())
                 tmp_path = tmp_file.name
-            engine = create_engine(f"sqlite:///{tmp_path}")
+            engine = SchemaEngine._create_read_only_engine(tmp_path, owns_file=True)
             schema_info = SchemaEngine._extract_schema_from_engine(engine)
             return engine, schema_info
         elif suffix in ["csv"]:
             uploaded_df = pd.read_csv(db_file)
-            engine = create_engine("sqlite:///:memory:")
-            uploaded_df.to_sql("uploaded_table", engine, index=False, if_exists="replace")
+            tmp_path = SchemaEngine._write_working_database({"uploaded_table": uploaded_df})
+            engine = SchemaEngine._create_read_only_engine(tmp_path, owns_file=True)
             schema_info = SchemaEngine._extract_schema_from_dataframe(uploaded_df, "uploaded_table")
             return engine, schema_info
         elif suffix in ["xlsx", "xls"]:
-            uploaded_df = pd.read_excel(db_file)
-            engine = create_engine("sqlite:///:memory:")
-            uploaded_df.to_sql("uploaded_table", engine, index=False, if_exists="replace")
-            schema_info = SchemaEngine._extract_schema_from_dataframe(uploaded_df, "uploaded_table")
+            ingestor = ExcelIngestor()
+            parquet_tables = ingestor.main_ingestor(db_file)
+            if not parquet_tables:
+                raise ValueError("The uploaded workbook does not contain any sheets with data.")
+            try:
+                tmp_path = SchemaEngine._stream_parquet_into_database(parquet_tables)
+            except OSError:
+                # Another session evicted the cache entry before it was read; convert again
+                db_file.seek(0)
+                tmp_path = SchemaEngine._stream_parquet_into_database(ingestor.main_ingestor(db_file))
+            engine = SchemaEngine._create_read_only_engine(tmp_path, owns_file=True)
+            schema_info = SchemaEngine._extract_schema_from_engine(engine)
             return engine, schema_info
         else:
             raise ValueError("Unsupported file type. Please upload SQLite, CSV, or Excel.")
 
+    @staticmethod
+    def _create_read_only_engine(db_path: str, attachments=None, owns_file: bool = False):
+        """
+        Open an uploaded SQLite file read-only in immutable URI mode.
+        Immutable mode skips file locking and change detection, so concurrent
+        readers in different threads never contend; each pooled connection gets
+        a large memory map and page cache.
+        attachments maps schema names to further SQLite files that are attached
+        read-only (but not immutable, since they may still change).
+        With owns_file, db_path is a working copy that is deleted once the
+        engine is garbage collected.
+        """
+        uri = f"{Path(db_path).resolve().as_uri()}?mode=ro&immutable=1"
+        attachments = attachments or {}
+
+        def connect():
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            for schema_name, attached_path in attachments.items():
+                connection.execute(
+                    f'ATTACH DATABASE ? AS "{schema_name}"',
+                    (f"{Path(attached_path).resolve().as_uri()}?mode=ro",)
+                )
+            connection.execute(f"PRAGMA mmap_size={READ_MMAP_SIZE_BYTES}")
+            connection.execute(f"PRAGMA cache_size=-{READ_CACHE_SIZE_KIB}")
+            connection.execute("PRAGMA temp_store=MEMORY")
+            connection.execute("PRAGMA query_only=ON")
+            return connection
+
+        engine = create_engine(
+            "sqlite://",
+            creator=connect,
+            poolclass=QueuePool,
+            pool_size=READ_POOL_SIZE,
+            max_overflow=READ_POOL_SIZE
+        )
+        if owns_file:
+            weakref.finalize(engine, _remove_file, db_path)
+        return engine
+
+    @staticmethod
+    def _write_working_database(tables) -> str:
+        """
+        Write DataFrames into a new on-disk SQLite file and return its path.
+        An on-disk file can be shared by every pooled connection, unlike a
+        per-connection :memory: database.
+        """
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.sqlite') as tmp_file:
+            tmp_path = tmp_file.name
+        write_engine = create_engine(f"sqlite:///{tmp_path}")
+        try:
+            for table_name, df in tables.items():
+                df.to_sql(table_name, write_engine, index=False, if_exists="replace")
+        except Exception:
+            write_engine.dispose()
+            _remove_file(tmp_path)
+            raise
+        write_engine.dispose()
+        return tmp_path
+
+    @staticmethod
+    def _stream_parquet_into_database(parquet_tables) -> str:
+        """
+        Stream Parquet files into a new on-disk SQLite file in record batches,
+        so a large sheet is never fully materialized as one DataFrame.
+        """
+        # pyarrow is only needed for Excel uploads, so keep it off the startup path
+        import pyarrow.parquet as pq
+
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.sqlite') as tmp_file:
+            tmp_path = tmp_file.name
+        write_engine = create_engine(f"sqlite:///{tmp_path}")
+        try:
+            for table_name, parquet_path in parquet_tables.items():
+                parquet_file = pq.ParquetFile(parquet_path)
+                # Create the table up front so sheets without rows still appear in the schema
+                parquet_file.schema_arrow.empty_table().to_pandas().to_sql(table_name, write_engine, index=False, if_exists="replace")
+                for batch in parquet_file.iter_batches(batch_size=PARQUET_BATCH_ROWS):
+                    batch.to_pandas().to_sql(table_name, write_engine, index=False, if_exists="append")
+        except Exception:
+            write_engine.dispose()
+            _remove_file(tmp_path)
+            raise
+        write_engine.dispose()
+        return tmp_path
+
     @staticmethod
     def _extract_schema_from_engine(engine):
         inspector = inspect(engine)
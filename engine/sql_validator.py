@@ -0,0 +1,95 @@
+import re
+from typing import Dict, List
+from sqlalchemy import inspect, text
+from engine.executor import SQLExecutor
+
+NUMERIC_TYPE_MARKERS = ("INT", "REAL", "FLOA", "DOUB", "NUMERIC", "DECIMAL")
+
+STRING_LITERAL_PATTERN = re.compile(r"'((?:[^']|'')*)'")
+# The code right before a literal in a column = 'literal' style comparison,
+# with the column optionally qualified by a table or alias
+COMPARISON_BEFORE_LITERAL_PATTERN = re.compile(
+    r"(?:\b([A-Za-z_]\w*)\.)?\b([A-Za-z_]\w*)\s*(?:=|!=|<>|<=|>=|<|>)\s*$"
+)
+
+class SQLValidator:
+    def _column_types(self, engine) -> Dict[str, Dict[str, str]]:
+        """
+        Map lower-cased table names to their lower-cased column names and declared types.
+        """
+        inspector = inspect(engine)
+        return {
+            table_name.lower(): {col['name'].lower(): str(col['type']).upper() for col in inspector.get_columns(table_name)}
+            for table_name in inspector.get_table_names()
+        }
+
+    def _is_numeric_type(self, type_name: str) -> bool:
+        return any(marker in type_name for marker in NUMERIC_TYPE_MARKERS)
+
+    def _check_literal_types(self, sql_query: str, engine) -> List[str]:
+        """
+        Flag numeric columns compared with text literals that are not numbers.
+        Only the code between string literals is searched, so text inside a
+        literal is never taken for a comparison. A qualifier naming a table
+        restricts the lookup to that table; aliases fall back to every table
+        with a column of that name.
+        """
+        warnings = []
+        column_types = self._column_types(engine)
+        code_start = 0
+        for literal_match in STRING_LITERAL_PATTERN.finditer(sql_query):
+            comparison = COMPARISON_BEFORE_LITERAL_PATTERN.search(sql_query, code_start, literal_match.start())
+            code_start = literal_match.end()
+            if comparison is None:
+                continue
+            qualifier, column = comparison.group(1), comparison.group(2)
+            literal = literal_match.group(1)
+            tables = [column_types[qualifier.lower()]] if qualifier and qualifier.lower() in column_types else column_types.values()
+            types = [columns[column.lower()] for columns in tables if column.lower() in columns]
+            if not types or not all(self._is_numeric_type(t) for t in types):
+                continue
+            try:
+                float(literal)
+            except ValueError:
+                warnings.append(
+                    f"Column '{column}' is numeric ({types[0]}) but is compared with text value '{literal}'"
+                )
+        return warnings
+
+    def main_validator(self, sql_query: str, engine) -> Dict:
+        """
+        Check generated SQL against the database schema without running it.
+        SQLite compiles the statement for EXPLAIN, which resolves every table,
+        column and alias and reports the first unknown name.
+        Args:
+            sql_query: SQL query to validate
+            engine: SQLAlchemy engine for the uploaded database
+        Returns:
+            Dictionary containing:
+                - valid: True when SQLite compiled the query
+                - errors: List of precise error messages
+                - warnings: Likely mistakes that SQLite accepts, such as a numeric
+                  column compared with text (SQLite allows text in INTEGER columns)
+        """
+        if not sql_query or not sql_query.strip():
+            return {"valid": False, "errors": ["The generated SQL query is empty"], "warnings": []}
+        if not SQLExecutor().is_read_only_query(sql_query):
+            return {"valid": False, "errors": ["Only SELECT queries are allowed"], "warnings": []}
+
+        errors = []
+        try:
+            with engine.connect() as connection:
+                connection.execute(text(f"EXPLAIN {sql_query.strip().rstrip(';')}"))
+        except Exception as e:
+            # Keep only the driver message, e.g. "no such column: p.nme"
+            message = str(getattr(e, 'orig', None) or e).split('\n')[0]
+            errors.append(message)
+
+        warnings = []
+        try:
+            warnings = self._check_literal_types(sql_query, engine)
+        except Exception:
+            # Type hints are best effort; name resolution above is authoritative
+            pass
+
+        return {"valid": not errors, "errors": errors, "warnings": warnings}
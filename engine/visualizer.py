@@ -1,17 +1,12 @@
-import os
-import sys
 from typing import Dict, List
 import pandas as pd
-
-# Add the project root directory to Python path
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(project_root)
-
 from llm_config.llm_call import generate_text
+from llm_config.scheduler import PRIORITY_BACKGROUND
+from engine.chart_recommender import ChartRecommender
 
 class SQLVisualizer:
     def __init__(self):
-        pass
+        self.recommender = ChartRecommender()
 
     def _clean_python_output(self, python_text: str) -> str:
         """
@@ -30,15 +25,26 @@ class SQLVisualizer:
     
     def main_visualizer(self, query_info: str, query_results: List[Dict], api_key: str = None) -> Dict:
         """
-        Generate visualization code for the given query and results using LLM.
+        Generate visualization code for the given query and results.
+        Common result shapes are charted by ChartRecommender without an LLM call;
+        the LLM is only asked for unusual shapes.
         Args:
             query_info: The original query string
             query_results: List of dictionaries with SQL results
             api_key: API key for LLM (optional, will use .env if not provided)
         Returns:
-            Dict with keys: success, generated_code, error
+            Dict with keys: success, generated_code, chart_type, error
         """
         try:
+            recommendation = self.recommender.main_recommender(query_results)
+            if recommendation["generated_code"]:
+                return {
+                    "success": True,
+                    "generated_code": recommendation["generated_code"],
+                    "chart_type": recommendation["chart_type"],
+                    "error": None
+                }
+
             # Create DataFrame just for reference
             df = pd.DataFrame(query_results)
             
@@ -56,7 +62,7 @@ class SQLVisualizer:
             - Use only the 'df' DataFrame for all visualizations.
             - Do not create or use any other DataFrame or data variable.
             - Create visualizations using the DataFrame.
-            - Use plt.figure(figsize=(12, 8), dpi=300) for each plot for high quality.
+            - Use plt.figure(figsize=(12, 8)) for each plot; resolution is set when the figure is saved.
             - DO NOT use plt.show() or plt.close() - these will be handled automatically.
             - Handle multiple plots properly.
             - Return ONLY the raw Python code, no markdown formatting, no ```python or ``` markers.
@@ -66,13 +72,14 @@ class SQLVisualizer:
             - Set appropriate figure sizes for readability.
             """
             
-            viz_code = generate_text(prompt, api_key)
+            viz_code = generate_text(prompt, api_key, priority=PRIORITY_BACKGROUND)
             # Clean the visualization code to remove any markdown markers
             viz_code = self._clean_python_output(viz_code)
 
             return {
                 "success": True,
                 "generated_code": viz_code,
+                "chart_type": None,
                 "error": None
             }
             
@@ -80,5 +87,6 @@ class SQLVisualizer:
             return {
                 "success": False,
                 "generated_code": None,
+                "chart_type": None,
                 "error": str(e)
             }
\ No newline at end of file
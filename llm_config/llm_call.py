@@ -1,12 +1,33 @@
 import requests
 import os
+from llm_config.scheduler import scheduler, PRIORITY_INTERACTIVE
 
 LLM_API_URL = "https://api.deepseek.com/v1/chat/completions"
+MAX_RESPONSE_TOKENS = 1024
+CHARS_PER_TOKEN = 4
 
 conversation_history = []
 max_turns = 5
 
-def generate_text(prompt: str, api_key: str):
+def generate_text(prompt: str, api_key: str, priority: int = PRIORITY_INTERACTIVE):
+    """
+    Generate text using the DeepSeek LLM through the process-wide scheduler.
+    Identical prompts already in flight for the same API key share one response.
+    """
+    key = scheduler.request_key({"prompt": prompt, "api_key": api_key})
+    estimated_tokens = _estimate_tokens(prompt)
+    return scheduler.submit(
+        key,
+        lambda: _generate_with_history(prompt, api_key, estimated_tokens),
+        priority=priority,
+        estimated_tokens=estimated_tokens
+    )
+
+def _estimate_tokens(prompt: str) -> int:
+    history_chars = sum(len(entry["content"]) for entry in conversation_history[-(max_turns * 2):])
+    return (history_chars + len(prompt)) // CHARS_PER_TOKEN + MAX_RESPONSE_TOKENS
+
+def _generate_with_history(prompt: str, api_key: str, estimated_tokens: int):
     """Generate text using the DeepSeek LLM with conversation history and user API key."""
     global conversation_history
     conversation_history.append({"role": "user", "content": prompt})
@@ -18,9 +39,9 @@ def generate_text(prompt: str, api_key: str):
             "role": entry["role"],
             "content": entry["content"]
         })
-    return _call_llm_api(messages, api_key)
+    return _call_llm_api(messages, api_key, estimated_tokens)
 
-def _call_llm_api(messages, api_key: str):
+def _call_llm_api(messages, api_key: str, estimated_tokens: int = 0):
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
@@ -29,20 +50,26 @@ def _call_llm_api(messages, api_key: str):
         "model": "deepseek-chat",
         "messages": messages,
         "temperature": 0,
-        "max_tokens": 1024
+        "max_tokens": MAX_RESPONSE_TOKENS
     }
     try:
         response = requests.post(LLM_API_URL, headers=headers, json=payload)
         if response.status_code == 200:
             response_json = response.json()
             generated_text = response_json.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+            # The request was served, so without reported usage keep the estimate as the charge
+            used_tokens = (response_json.get("usage") or {}).get("total_tokens")
+            if used_tokens:
+                scheduler.record_usage(estimated_tokens, used_tokens)
             _update_conversation_history(generated_text)
             return generated_text
         else:
+            scheduler.record_usage(estimated_tokens, 0)
             error_msg = f"Error: {response.status_code} - {response.text}"
             print(error_msg)
             return error_msg
     except Exception as e:
+        scheduler.record_usage(estimated_tokens, 0)
         error_msg = f"Error calling LLM API: {str(e)}"
         print(error_msg)
         return error_msg
@@ -0,0 +1,169 @@
+import hashlib
+import heapq
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+# Interactive steps (SQL generation, extraction, refinement) go ahead of background analysis
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+REQUESTS_PER_MINUTE = 60
+TOKENS_PER_MINUTE = 120000
+MAX_CONCURRENT_REQUESTS = 8
+
+
+class TokenBucket:
+    """Refills continuously up to capacity at capacity-per-minute."""
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.refill_rate = per_minute / 60.0
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def seconds_until(self, amount: float) -> float:
+        self._refill()
+        # Requests larger than the bucket only wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.refill_rate
+
+    def charge_for(self, amount: float) -> float:
+        """Cap a single charge at one full bucket so one huge request cannot starve everyone else."""
+        return min(amount, self.capacity)
+
+    def consume(self, amount: float):
+        """Take amount out of the bucket (negative amounts refund), never going below one bucket of debt."""
+        self._refill()
+        self.available = max(-self.capacity, min(self.capacity, self.available - amount))
+
+
+class LLMScheduler:
+    """
+    Process-wide gate for LLM calls: token-bucket rate limiting on requests
+    and tokens, priority ordering of waiting callers and merging of identical
+    in-flight requests.
+    """
+    def __init__(self, requests_per_minute: int = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = TOKENS_PER_MINUTE,
+                 max_concurrent: int = MAX_CONCURRENT_REQUESTS):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrent = max_concurrent
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._in_flight: Dict[str, Future] = {}
+        self._stats = {
+            "requests_total": 0,
+            "deduplicated_total": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0
+        }
+
+    @staticmethod
+    def request_key(payload) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _acquire(self, priority: int, estimated_tokens: int) -> float:
+        """
+        Block until this caller is first in priority order and both buckets
+        have capacity. Returns the time spent waiting.
+        """
+        enqueued_at = time.monotonic()
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                if self._waiting[0] == ticket and self._running < self.max_concurrent:
+                    delay = max(self.request_bucket.seconds_until(1),
+                                self.token_bucket.seconds_until(estimated_tokens))
+                    if delay == 0:
+                        break
+                    self._condition.wait(timeout=delay)
+                else:
+                    self._condition.wait()
+            heapq.heappop(self._waiting)
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(self.token_bucket.charge_for(estimated_tokens))
+            self._running += 1
+            waited = time.monotonic() - enqueued_at
+            self._stats["requests_total"] += 1
+            self._stats["total_wait_seconds"] += waited
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+            self._condition.notify_all()
+        return waited
+
+    def _release(self):
+        with self._condition:
+            self._running -= 1
+            self._condition.notify_all()
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """
+        Correct the token bucket once the provider reports real usage.
+        Pass actual_tokens=0 to refund a request that failed before using any tokens.
+        """
+        with self._condition:
+            charge_for = self.token_bucket.charge_for
+            self.token_bucket.consume(charge_for(actual_tokens) - charge_for(estimated_tokens))
+            self._condition.notify_all()
+
+    def submit(self, key: str, call: Callable, priority: int = PRIORITY_INTERACTIVE, estimated_tokens: int = 0):
+        """
+        Run call() once rate limits allow it. Callers submitting the same key
+        while a request is in flight share its result instead of calling again.
+        """
+        with self._condition:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats["deduplicated_total"] += 1
+                leader = False
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                leader = True
+        if not leader:
+            return future.result()
+
+        try:
+            self._acquire(priority, estimated_tokens)
+            try:
+                future.set_result(call())
+            finally:
+                self._release()
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._condition:
+                self._in_flight.pop(key, None)
+        return future.result()
+
+    def get_stats(self) -> Dict:
+        """
+        Snapshot of queue depth, in-flight requests and wait times.
+        """
+        with self._condition:
+            requests_total = self._stats["requests_total"]
+            return {
+                "queue_depth": len(self._waiting),
+                "running": self._running,
+                "in_flight": len(self._in_flight),
+                "requests_total": requests_total,
+                "deduplicated_total": self._stats["deduplicated_total"],
+                "avg_wait_seconds": self._stats["total_wait_seconds"] / requests_total if requests_total else 0.0,
+                "max_wait_seconds": self._stats["max_wait_seconds"]
+            }
+
+
+scheduler = LLMScheduler()
@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Everything app.py imports before the first rerun, apart from streamlit itself
+STARTUP_MODULES = [
+    "pandas",
+    "engine.generator",
+    "engine.sql_validator",
+    "engine.entity_extractor",
+    "engine.value_matcher",
+    "engine.refiner",
+    "engine.executor",
+    "engine.analyzer",
+    "engine.visualizer",
+    "engine.renderer",
+    "engine.schema_engine",
+    "engine.result_cache",
+    "llm_config.scheduler",
+]
+
+def profile_imports(modules: List[str] = None) -> List[Dict]:
+    """
+    Import modules in a fresh interpreter with -X importtime.
+    Args:
+        modules: Module names to import (defaults to the app's startup modules)
+    Returns:
+        List of dictionaries with module, depth, self_ms and cumulative_ms
+    """
+    modules = modules or STARTUP_MODULES
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {name}" for name in modules)],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    timings = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        timings.append({
+            "module": module.strip(),
+            # Nested imports are indented two spaces per level after the separator
+            "depth": (len(module) - len(module.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+    return timings
+
+def format_report(timings: List[Dict], top: int = 25) -> str:
+    """
+    Format the slowest imports by cumulative time, with project modules listed separately.
+    """
+    top_level = [t for t in timings if t["depth"] == 0]
+    total_ms = sum(t["cumulative_ms"] for t in top_level)
+    slowest = sorted(timings, key=lambda t: t["cumulative_ms"], reverse=True)[:top]
+    project = [t for t in timings if t["module"].split(".")[0] in ("engine", "llm_config", "utils")]
+
+    lines = [f"Total import time: {total_ms:.1f} ms", "", "Slowest imports (cumulative):"]
+    lines += [f"  {t['cumulative_ms']:9.1f} ms  {t['module']}" for t in slowest]
+    lines += ["", "Project modules (self / cumulative):"]
+    lines += [f"  {t['self_ms']:7.1f} / {t['cumulative_ms']:9.1f} ms  {t['module']}" for t in project]
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    print(format_report(profile_imports(sys.argv[1:] or None)))